@@ -1,14 +1,931 @@
+import io
+import json
+import math
+import mmap
 import os
-import shutil
-from zipfile import ZipFile
+import re
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from functools import cached_property, lru_cache
+from itertools import islice
+from zipfile import ZIP_DEFLATED, ZIP_STORED, BadZipFile, ZipFile, ZipInfo
 
-import matplotlib.pyplot as plt
-import mesa_reader as mesa
 import numpy as np
 import pandas as pd
-from sqlalchemy import create_engine
 
-import gyre_reader
+_COPY_BUFSIZE = 1024 * 1024
+
+_EXTRACTION_BACKENDS = ('thread', 'process')
+
+# SQLite caps mmap_size at its compile-time maximum, so the whole database
+# is mapped if it fits.
+_SQLITE_PRAGMAS = (
+    'PRAGMA cache_size=-65536',
+    'PRAGMA mmap_size=30000000000',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA synchronous=NORMAL',
+)
+
+_BLOCK_INDEX_SUFFIX = '.idx'
+_BLOCK_INDEX_COMMENT = b'sdb_grid_reader block index'
+
+_MODEL_NAME_PATTERNS = {
+    'evol': re.compile(r'custom_He(.+)\.data$'),
+    'puls': re.compile(r'custom_He(.+)_summary\.txt$'),
+    'gyre_input': re.compile(r'custom_He(.+)\.data\.GYRE$'),
+}
+
+_SCRATCH_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+_LOCAL_HEADER_SIZE = 30
+_LOCAL_HEADER_SIGNATURE = b'PK\x03\x04'
+_CENTRAL_HEADER_SIGNATURE = b'PK\x01\x02'
+_END_SIGNATURE = b'PK\x05\x06'
+_ZIP64_END_SIGNATURE = b'PK\x06\x06'
+_ZIP64_LOCATOR_SIGNATURE = b'PK\x06\x07'
+_ZIP64_LIMIT = 0xFFFFFFFF
+_ZIP_FILECOUNT_LIMIT = 0xFFFF
+
+
+def _extract_member(archive, grid_zip_path, dest_path):
+    """Extracts a single member of an archive to a file.
+
+    On Linux the bytes of stored (uncompressed) members are copied
+    between the files by the kernel, other members are decompressed
+    and copied in chunks through a reused buffer. Space for large files
+    is allocated up front.
+
+    Parameters
+    ----------
+    archive : ZipFile
+        Open zip archive.
+    grid_zip_path : str
+        Path of the member in the archive.
+    dest_path : str
+        Path to the extracted file.
+
+    Returns
+    ----------
+    """
+
+    info = archive.getinfo(grid_zip_path)
+    if (sys.platform.startswith('linux') and info.compress_type == ZIP_STORED
+            and not info.flag_bits & 0x1):
+        try:
+            zip_fd = archive.fp.fileno()
+        except (AttributeError, io.UnsupportedOperation):
+            pass
+        else:
+            with open(dest_path, 'wb') as dest_file:
+                _preallocate(dest_file.fileno(), info.file_size)
+                header = os.pread(zip_fd, _LOCAL_HEADER_SIZE, info.header_offset)
+                _copy_file_range(zip_fd, dest_file.fileno(),
+                                 _member_data_offset(header, info), info.file_size)
+            return
+    with archive.open(info) as zipped_file, open(dest_path, 'wb') as dest_file:
+        _preallocate(dest_file.fileno(), info.file_size)
+        buffer = bytearray(_COPY_BUFSIZE)
+        view = memoryview(buffer)
+        size = zipped_file.readinto(buffer)
+        while size:
+            dest_file.write(view[:size])
+            size = zipped_file.readinto(buffer)
+
+
+def _extract_member_tree(archive, grid_zip_path, dest_dir):
+    """Extracts a single member of an archive with its directory structure.
+
+    Same as ZipFile.extract, but copies the member with '_extract_member'.
+
+    Parameters
+    ----------
+    archive : ZipFile
+        Open zip archive.
+    grid_zip_path : str
+        Path of the member in the archive.
+    dest_dir : str
+        Root directory of the extracted tree.
+
+    Returns
+    ----------
+    """
+
+    dest_path = _member_dest_path(dest_dir, grid_zip_path)
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    _extract_member(archive, grid_zip_path, dest_path)
+
+
+def _member_dest_path(dest_dir, grid_zip_path):
+    """Returns a path of an archive member extracted to a directory.
+
+    Absolute paths, drive letters and '..' components are dropped the same
+    way as in ZipFile.extract, so the member stays inside 'dest_dir'.
+
+    Parameters
+    ----------
+    dest_dir : str
+        Root directory of the extracted tree.
+    grid_zip_path : str
+        Path of the member in the archive.
+
+    Returns
+    ----------
+    str
+        Path of the extracted member.
+    """
+
+    parts = (os.path.splitdrive(part)[1] for part in grid_zip_path.split('/'))
+    parts = [part for part in parts if part not in ('', os.path.curdir, os.path.pardir)]
+    return os.path.join(dest_dir, *parts)
+
+
+def _preallocate(fd, size):
+    """Allocates disk space for a file larger than the copy buffer.
+
+    Reduces fragmentation of large files. Does nothing if the platform
+    or the filesystem does not support it.
+
+    Parameters
+    ----------
+    fd : int
+        File descriptor opened for writing.
+    size : int
+        Final size of the file.
+
+    Returns
+    ----------
+    """
+
+    if size >= _COPY_BUFSIZE and hasattr(os, 'posix_fallocate'):
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass
+
+
+def _has_member(archive, name):
+    """Checks if a member exists in an archive.
+
+    Looks up the name in the dictionary of members of ZipFile instead
+    of scanning the list of all names.
+
+    Parameters
+    ----------
+    archive : ZipFile
+        Open zip archive.
+    name : str
+        Path of the member in the archive.
+
+    Returns
+    ----------
+    bool
+        True if the member exists, False otherwise.
+    """
+
+    try:
+        archive.getinfo(name)
+    except KeyError:
+        return False
+    return True
+
+
+def _is_block_index(info):
+    """Checks if an archive member is a block index written by
+    'repack_archive'.
+
+    Block indices are marked by a member comment, so other files with
+    the same suffix are not mistaken for them.
+
+    Parameters
+    ----------
+    info : ZipInfo
+        Archive member.
+
+    Returns
+    ----------
+    bool
+        True if the member is a block index, False otherwise.
+    """
+
+    return info.filename.endswith(_BLOCK_INDEX_SUFFIX) and info.comment == _BLOCK_INDEX_COMMENT
+
+
+def _member_data_offset(header, info):
+    """Returns the offset of the data of an archive member.
+
+    Parameters
+    ----------
+    header : bytes
+        First '_LOCAL_HEADER_SIZE' bytes of the local header of the member,
+        starting at 'info.header_offset'.
+    info : ZipInfo
+        Archive member.
+
+    Returns
+    ----------
+    int
+        Offset of the first byte of the (compressed) member data.
+    """
+
+    if len(header) < _LOCAL_HEADER_SIZE or header[:4] != _LOCAL_HEADER_SIGNATURE:
+        raise ValueError(f"Bad local file header of '{info.filename}'.")
+    name_length, extra_length = struct.unpack('<HH', header[26:30])
+    return info.header_offset + _LOCAL_HEADER_SIZE + name_length + extra_length
+
+
+def _copy_file_range(src_fd, dest_fd, offset, count):
+    """Copies 'count' bytes starting at 'offset' between two files
+    without passing them through user space.
+
+    Parameters
+    ----------
+    src_fd : int
+        Source file descriptor. Its file position is not changed.
+    dest_fd : int
+        Destination file descriptor.
+    offset : int
+        Offset of the first copied byte in the source file.
+    count : int
+        Number of bytes to copy.
+
+    Returns
+    ----------
+    """
+
+    use_copy_file_range = hasattr(os, 'copy_file_range')
+    while count > 0:
+        if use_copy_file_range:
+            try:
+                copied = os.copy_file_range(src_fd, dest_fd, count, offset)
+            except OSError:
+                # Not supported by the kernel or the filesystems.
+                use_copy_file_range = False
+                continue
+        else:
+            copied = os.sendfile(dest_fd, src_fd, offset, count)
+        if copied == 0:
+            raise EOFError('Unexpected end of the zip archive.')
+        offset += copied
+        count -= copied
+
+
+def _he4_key(he4):
+    """Returns a helium abundance in millionths as an integer.
+
+    Models are named after helium abundances rounded to six decimal places.
+    Unlike the rounded float, the integer key compares and hashes exactly,
+    so it is used to index models, but never to build their names.
+
+    Parameters
+    ----------
+    he4 : float
+        Central helium abundance.
+
+    Returns
+    ----------
+    int
+        Helium abundance in millionths.
+
+    Raises
+    ----------
+    ValueError
+        If the helium abundance is not finite.
+    """
+
+    he4 = round(float(he4), 6)
+    if not math.isfinite(he4):
+        raise ValueError(f'Helium abundance has to be finite, got {he4}.')
+    return round(he4 * 1_000_000)
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _model_name(he4, suffix):
+    """Returns a name of a model file.
+
+    NumPy scalars are named as the equivalent Python numbers, so that
+    values taken from arrays get the same names as in '_model_names'.
+
+    Parameters
+    ----------
+    he4 : float
+        Central helium abundance of the model.
+    suffix : str
+        Suffix of the file name.
+
+    Returns
+    ----------
+    str
+        Name of the model file.
+    """
+
+    if isinstance(he4, np.generic):
+        he4 = he4.item()
+    return f"custom_He{round(he4, 6)}{suffix}"
+
+
+def _round_he4(he4):
+    """Rounds helium abundances to six decimal places.
+
+    Vectorized version of 'round(he4, 6)' giving the same results for
+    floats. All values are converted to floats first. NumPy rounds
+    a scaled value, which differs from Python at ties of the seventh
+    decimal place, so values close to a tie are rounded by Python.
+    Non-finite values are returned unchanged.
+
+    Parameters
+    ----------
+    he4 : array_like
+        Central helium abundances.
+
+    Returns
+    ----------
+    ndarray of float
+        Rounded helium abundances.
+    """
+
+    values = pd.Series(he4, dtype=float).to_numpy()
+    rounded = values.round(6)
+    finite = np.isfinite(values)
+    scaled = np.abs(values[finite]) * 1_000_000
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(scaled, 1.0)
+    ties = np.flatnonzero(finite)[near_tie]
+    rounded[ties] = [round(value, 6) for value in values[ties].tolist()]
+    return rounded
+
+
+def _model_names(he4, suffix):
+    """Returns names of model files.
+
+    Vectorized version of '_model_name' giving the same names. Like
+    'round(he4, 6)', integers keep their integer form, e.g. 0 gives
+    'custom_He0' and 0.0 gives 'custom_He0.0'. Values of arrays are named
+    as the equivalent Python numbers. Sequences with values of other types
+    than float are named value by value.
+
+    Parameters
+    ----------
+    he4 : array_like
+        Central helium abundances of the models.
+    suffix : str
+        Suffix of the file names.
+
+    Returns
+    ----------
+    ndarray of str
+        Names of the model files.
+    """
+
+    if not isinstance(he4, (np.ndarray, pd.Series, pd.Index)):
+        he4 = list(he4)
+        if not all(type(value) is float for value in he4):
+            he4 = np.array(he4, dtype=object)
+    values = np.asarray(he4)
+    if values.dtype.kind in 'iu':
+        rounded = values.astype(str)
+    elif values.dtype.kind == 'f':
+        rounded = _round_he4(values).astype(str)
+    else:
+        return np.array([_model_name(value, suffix) for value in values.tolist()], dtype=str)
+    return np.char.add(np.char.add('custom_He', rounded), suffix)
+
+
+_worker_archive = None
+
+
+def _init_worker_archive(grid_zip_file):
+    """Opens the archive used by an extraction worker process.
+
+    Parameters
+    ----------
+    grid_zip_file : str
+        Path to the zip archive.
+
+    Returns
+    ----------
+    """
+
+    global _worker_archive
+    _worker_archive = ZipFile(grid_zip_file)
+
+
+def _extract_worker_member(grid_zip_path, dest_path):
+    """Extracts a single member of the archive of a worker process.
+
+    Parameters
+    ----------
+    grid_zip_path : str
+        Path of the member in the archive.
+    dest_path : str
+        Path to the extracted file.
+
+    Returns
+    ----------
+    """
+
+    _extract_member(_worker_archive, grid_zip_path, dest_path)
+
+
+def _read_archived_puls_model(archive, grid_zip_file, grid_zip_path, crc):
+    """Reads a calculated GYRE model from an archive.
+
+    Used through joblib.Memory, which ignores 'archive', so cached models
+    are keyed by the path of the archive, the member and its CRC-32.
+    A changed member gets a new CRC-32 and is read again.
+
+    Parameters
+    ----------
+    archive : ZipFile
+        Open zip archive.
+    grid_zip_file : str
+        Path to the zip archive.
+    grid_zip_path : str
+        Path of the member in the archive.
+    crc : int
+        CRC-32 of the member.
+
+    Returns
+    ----------
+    GyreData
+        Pulsation model as GyreData object.
+    """
+
+    import gyre_reader
+
+    with tempfile.TemporaryDirectory(dir=_SCRATCH_DIR) as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, grid_zip_path.rsplit('/', 1)[-1])
+        _extract_member(archive, grid_zip_path, tmp_path)
+        return gyre_reader.GyreData(tmp_path)
+
+
+class _PreadFile():
+    """Read-only file object reading a shared file descriptor with os.pread.
+
+    Every instance keeps its own position and never moves the position
+    of the descriptor, so threads can read the same file through their own
+    instances without seeking each other's position or locking.
+
+    Parameters
+    ----------
+    fd : int
+        File descriptor opened for reading. It is not closed by the object.
+    size : int
+        Size of the file.
+    """
+
+    def __init__(self, fd, size):
+        self._fd = fd
+        self._size = size
+        self._pos = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = max(self._size - self._pos, 0)
+        data = os.pread(self._fd, size, self._pos)
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence}).')
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        return self._fd
+
+    def close(self):
+        pass
+
+
+class _MappedFile():
+    """Read-only file object reading a memory-mapped file.
+
+    Reads are served from the page cache without read system calls.
+    The descriptor is still available through 'fileno', so members can be
+    copied in the kernel.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        self._pos = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = len(self._map)
+        else:
+            end = self._pos + size
+        data = self._map[self._pos:end]
+        self._pos += len(data)
+        return data
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = len(self._map) + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence}).')
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def seekable(self):
+        return True
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def _close_archive(archive):
+    """Closes a zip archive together with its memory-mapped file.
+
+    Parameters
+    ----------
+    archive : ZipFile
+        Open zip archive.
+
+    Returns
+    ----------
+    """
+
+    zip_file = archive.fp
+    archive.close()
+    if isinstance(zip_file, _MappedFile):
+        zip_file.close()
+
+
+class _ThreadArchives():
+    """Zip archives opened separately for every thread.
+
+    A ZipFile is not safe for concurrent reads, so every thread gets its
+    own handle to each archive. On POSIX systems the handles of an archive
+    share a single file descriptor read with os.pread. All handles are
+    closed on exit.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._files = {}
+        self._archives = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, grid_zip_file):
+        """Returns the handle of the current thread to an archive.
+
+        Parameters
+        ----------
+        grid_zip_file : str
+            Path to the zip archive.
+
+        Returns
+        ----------
+        ZipFile
+            Open zip archive.
+        """
+
+        archives = getattr(self._local, 'archives', None)
+        if archives is None:
+            archives = self._local.archives = {}
+        archive = archives.get(grid_zip_file)
+        if archive is None:
+            if hasattr(os, 'pread'):
+                with self._lock:
+                    if grid_zip_file not in self._files:
+                        zip_fd = os.open(grid_zip_file, os.O_RDONLY)
+                        self._files[grid_zip_file] = (zip_fd, os.fstat(zip_fd).st_size)
+                    zip_fd, zip_size = self._files[grid_zip_file]
+                archive = ZipFile(_PreadFile(zip_fd, zip_size))
+            else:
+                archive = ZipFile(grid_zip_file)
+            archives[grid_zip_file] = archive
+            with self._lock:
+                self._archives.append(archive)
+        return archive
+
+    def close(self):
+        """Closes all handles.
+
+        Returns
+        ----------
+        """
+
+        for archive in self._archives:
+            archive.close()
+        for zip_fd, _ in self._files.values():
+            os.close(zip_fd)
+        self._archives = []
+        self._files = {}
+
+
+class _BlockCompressor():
+    """Raw DEFLATE compressor resetting its state every 'block_size' bytes
+    of input, so that the compressed blocks can be inflated independently.
+
+    Parameters
+    ----------
+    block_size : int
+        Number of uncompressed bytes in a block.
+    level : int
+        Compression level.
+
+    Attributes
+    ----------
+    boundaries : list of tuple
+        Compressed and uncompressed offsets of the starts of the blocks.
+    """
+
+    def __init__(self, block_size, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        self._block_size = block_size
+        self._block_fill = 0
+        self._compressed = 0
+        self._uncompressed = 0
+        self.boundaries = [(0, 0)]
+
+    def compress(self, data):
+        chunks = []
+        view = memoryview(data)
+        while view:
+            size = min(len(view), self._block_size - self._block_fill)
+            chunks.append(self._compressor.compress(view[:size]))
+            self._compressed += len(chunks[-1])
+            self._uncompressed += size
+            self._block_fill += size
+            view = view[size:]
+            if self._block_fill == self._block_size:
+                chunks.append(self._compressor.flush(zlib.Z_FULL_FLUSH))
+                self._compressed += len(chunks[-1])
+                self.boundaries.append((self._compressed, self._uncompressed))
+                self._block_fill = 0
+        return b''.join(chunks)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _ArchiveWriter():
+    """Writer of zip archives with members compressed by the caller.
+
+    ZipFile compresses members by itself and gives no control over its
+    compressor, so archives with members compressed in independent blocks
+    are written by this class. Large members and archives use the ZIP64
+    extensions.
+
+    Parameters
+    ----------
+    dest_file : file object
+        Seekable binary file opened for writing.
+    """
+
+    def __init__(self, dest_file):
+        self._file = dest_file
+        self._members = []
+
+    def write(self, info, chunks):
+        """Writes a member of the archive.
+
+        Parameters
+        ----------
+        info : ZipInfo
+            Member to write. 'info.file_size' has to be set. 'info.CRC' is
+            read after all chunks are written, so it may be set while
+            the chunks are generated.
+        chunks : iterable of bytes
+            Member data compressed with 'info.compress_type'.
+
+        Returns
+        ----------
+        """
+
+        name = info.filename.encode('utf-8')
+        flag_bits = info.flag_bits & ~0x08
+        if not info.filename.isascii():
+            flag_bits |= 0x800
+        zip64 = info.file_size * 1.05 > _ZIP64_LIMIT
+        extract_version = max(info.extract_version, 45 if zip64 else 20)
+        dos_date, dos_time = _dos_date_time(info.date_time)
+        extra = struct.pack('<2H2Q', 1, 16, 0, 0) if zip64 else b''
+        header_offset = self._file.tell()
+        self._file.write(struct.pack('<4s5H3L2H', _LOCAL_HEADER_SIGNATURE, extract_version,
+                                     flag_bits, info.compress_type, dos_time, dos_date,
+                                     0, 0, 0, len(name), len(extra)))
+        self._file.write(name + extra)
+        compress_size = 0
+        for chunk in chunks:
+            self._file.write(chunk)
+            compress_size += len(chunk)
+        end = self._file.tell()
+        if zip64:
+            self._file.seek(header_offset + 14)
+            self._file.write(struct.pack('<3L', info.CRC, _ZIP64_LIMIT, _ZIP64_LIMIT))
+            self._file.seek(header_offset + _LOCAL_HEADER_SIZE + len(name) + 4)
+            self._file.write(struct.pack('<2Q', info.file_size, compress_size))
+        else:
+            if compress_size > _ZIP64_LIMIT:
+                raise BadZipFile(f"Compressed size of '{info.filename}' exceeds "
+                                 f"the limit of a zip archive without ZIP64 extensions.")
+            self._file.seek(header_offset + 14)
+            self._file.write(struct.pack('<3L', info.CRC, compress_size, info.file_size))
+        self._file.seek(end)
+        self._members.append((info, name, flag_bits, extract_version, compress_size,
+                              header_offset))
+
+    def close(self):
+        """Writes the central directory of the archive.
+
+        Returns
+        ----------
+        """
+
+        directory_offset = self._file.tell()
+        for info, name, flag_bits, extract_version, compress_size, header_offset in self._members:
+            sizes = [info.file_size, compress_size, header_offset]
+            zip64_fields = [size for size in sizes if size >= _ZIP64_LIMIT]
+            sizes = [min(size, _ZIP64_LIMIT) for size in sizes]
+            extra = b''
+            if zip64_fields:
+                extra = struct.pack(f'<2H{len(zip64_fields)}Q', 1, 8 * len(zip64_fields),
+                                    *zip64_fields)
+                extract_version = max(extract_version, 45)
+            dos_date, dos_time = _dos_date_time(info.date_time)
+            self._file.write(struct.pack(
+                '<4s6H3L5H2L', _CENTRAL_HEADER_SIGNATURE,
+                info.create_system << 8 | extract_version, extract_version, flag_bits,
+                info.compress_type, dos_time, dos_date, info.CRC, sizes[1], sizes[0],
+                len(name), len(extra), len(info.comment), 0, 0, info.external_attr, sizes[2]))
+            self._file.write(name + extra + info.comment)
+        directory_end = self._file.tell()
+        directory_size = directory_end - directory_offset
+        count = len(self._members)
+        if (count >= _ZIP_FILECOUNT_LIMIT or directory_offset >= _ZIP64_LIMIT
+                or directory_size >= _ZIP64_LIMIT):
+            self._file.write(struct.pack('<4sQ2H2L4Q', _ZIP64_END_SIGNATURE, 44, 45, 45, 0, 0,
+                                         count, count, directory_size, directory_offset))
+            self._file.write(struct.pack('<4sLQL', _ZIP64_LOCATOR_SIGNATURE, 0,
+                                         directory_end, 1))
+        self._file.write(struct.pack('<4s4H2LH', _END_SIGNATURE, 0, 0,
+                                     min(count, _ZIP_FILECOUNT_LIMIT),
+                                     min(count, _ZIP_FILECOUNT_LIMIT),
+                                     min(directory_size, _ZIP64_LIMIT),
+                                     min(directory_offset, _ZIP64_LIMIT), 0))
+
+
+def _dos_date_time(date_time):
+    """Returns a date and time in the MS-DOS format used by zip archives.
+
+    Parameters
+    ----------
+    date_time : tuple of int
+        Year, month, day, hour, minute and second.
+
+    Returns
+    ----------
+    tuple of int
+        Date and time.
+    """
+
+    year, month, day, hour, minute, second = date_time
+    return (year - 1980) << 9 | month << 5 | day, hour << 11 | minute << 5 | second // 2
+
+
+def _read_chunks(zip_file, size):
+    """Yields 'size' bytes read from a file in chunks.
+
+    Parameters
+    ----------
+    zip_file : file object
+        File opened for reading at the first byte to read.
+    size : int
+        Number of bytes to read.
+
+    Returns
+    ----------
+    generator of bytes
+        Chunks of data.
+    """
+
+    while size:
+        data = zip_file.read(min(size, _COPY_BUFSIZE))
+        if not data:
+            raise EOFError('Unexpected end of the zip archive.')
+        size -= len(data)
+        yield data
+
+
+def repack_archive(src_zip_file, dest_zip_file, min_size=8 * 1024 * 1024,
+                   block_size=1024 * 1024, level=zlib.Z_DEFAULT_COMPRESSION):
+    """Rewrites a zip archive of the grid, so that large members can be
+    decompressed in parallel.
+
+    Members larger than 'min_size' are compressed in independent blocks of
+    'block_size' uncompressed bytes. The offsets of the blocks are stored
+    in an additional '<member>.idx' member marked by a member comment,
+    unless the archive already contains a file of that name. Other
+    members are copied without recompressing them. The archive stays a valid zip archive
+    readable by any tool.
+
+    Parameters
+    ----------
+    src_zip_file : str
+        Path to the original archive.
+    dest_zip_file : str
+        Path to the repacked archive.
+    min_size : int, optional
+        Minimum size of a member compressed in blocks. Default: 8 MiB.
+    block_size : int, optional
+        Number of uncompressed bytes in a block. Default: 1 MiB.
+    level : int, optional
+        Compression level. Default: zlib.Z_DEFAULT_COMPRESSION.
+
+    Returns
+    ----------
+    """
+
+    def compress_blocks(src_file, dest_info, compressor):
+        crc = 0
+        for data in iter(lambda: src_file.read(_COPY_BUFSIZE), b''):
+            crc = zlib.crc32(data, crc)
+            yield compressor.compress(data)
+        yield compressor.flush()
+        dest_info.CRC = crc
+
+    with ZipFile(src_zip_file) as src, open(src_zip_file, 'rb') as src_raw, \
+            open(dest_zip_file, 'wb') as dest_file:
+        dest = _ArchiveWriter(dest_file)
+        infos = [info for info in src.infolist() if not _is_block_index(info)]
+        names = {info.filename for info in infos}
+        for info in infos:
+            dest_info = ZipInfo(info.filename, info.date_time)
+            dest_info.external_attr = info.external_attr
+            dest_info.comment = info.comment
+            dest_info.create_system = info.create_system
+            dest_info.file_size = info.file_size
+            if (info.is_dir() or info.file_size < min_size
+                    or info.filename + _BLOCK_INDEX_SUFFIX in names):
+                dest_info.compress_type = info.compress_type
+                dest_info.extract_version = info.extract_version
+                dest_info.flag_bits = info.flag_bits
+                dest_info.CRC = info.CRC
+                src_raw.seek(info.header_offset)
+                src_raw.seek(_member_data_offset(src_raw.read(_LOCAL_HEADER_SIZE), info))
+                dest.write(dest_info, _read_chunks(src_raw, info.compress_size))
+                continue
+            dest_info.compress_type = ZIP_DEFLATED
+            compressor = _BlockCompressor(block_size, level)
+            with src.open(info) as src_file:
+                dest.write(dest_info, compress_blocks(src_file, dest_info, compressor))
+            index = json.dumps({'block_size': block_size, 'boundaries': compressor.boundaries})
+            index_info = ZipInfo(info.filename + _BLOCK_INDEX_SUFFIX, info.date_time)
+            index_info.external_attr = info.external_attr
+            index_info.create_system = info.create_system
+            index_info.compress_type = ZIP_STORED
+            index_info.comment = _BLOCK_INDEX_COMMENT
+            index_info.file_size = len(index)
+            index_info.CRC = zlib.crc32(index.encode())
+            dest.write(index_info, [index.encode()])
+        dest.close()
 
 
 class SdbGrid():
@@ -22,15 +939,37 @@ class SdbGrid():
         Database containing the grid of models.
     grid_dir : str
         Directory containing the zipped grid of models.
+    max_open_archives : int, optional
+        Maximum number of zip archives kept open between calls. Default: 32.
+    columns : list of str, optional
+        Columns of the database loaded into 'data'. Default: all columns.
+    where : str, optional
+        SQL condition selecting the models loaded into 'data', using
+        the column names of the database, e.g. "z_i = 0.015 AND m_i < 1.5".
+        Default: all models.
+    mmap_archives : bool, optional
+        If True zip archives are read through memory maps. Default: False.
+    cache_dir : str, optional
+        Directory caching GYRE models read by 'read_puls_model' with
+        joblib. Default: None (no caching).
+    compact : bool, optional
+        If True 'top_dir' and 'log_dir' columns of 'data' are stored as
+        categoricals to save memory. Default: False.
 
     Attributes
     ----------
+    he4_column : str
+        Column of the database containing the helium abundance used
+        in the names of the models.
     db_file : str
         Path to the input database. 
     grid_dir : str
         Path to the directory containing the zipped grid of models.
     data : DataFrame
-        Pandas DataFrame containing the grid.
+        Pandas DataFrame containing the grid. It is read from the database
+        on first access.
+    max_open_archives : int
+        Maximum number of zip archives kept open between calls.
 
     Examples
     ----------
@@ -41,9 +980,18 @@ class SdbGrid():
     Here `database` is the database containing the processed grid of
     calcualted MESA sdB models and `grid_dir` is the directory containing
     the full compressed grid. The grid is then initialized.
+
+    Opened archives are cached between calls, so the grid can be used as
+    a context manager to release them:
+
+    >>> with SdbGrid(database, grid_dir) as g:
+    ...     g.extract_evol_model(log_dir, top_dir, he4, dest_dir)
     """
 
-    def __init__(self, db_file, grid_dir):
+    he4_column = 'custom_profile'
+
+    def __init__(self, db_file, grid_dir, max_open_archives=32, columns=None, where=None,
+                 mmap_archives=False, cache_dir=None, compact=False):
         """Creates SdbGrid object from a processed
         grid of MESA sdB models.
 
@@ -53,12 +1001,41 @@ class SdbGrid():
             Database containing the grid of models.
         grid_dir : str
             Directory containing the zipped grid of models.
+        max_open_archives : int, optional
+            Maximum number of zip archives kept open between calls. With 0
+            only the archive used by the last call stays open. Default: 32.
+        columns : list of str, optional
+            Columns of the database loaded into 'data'. Default: all columns.
+        where : str, optional
+            SQL condition selecting the models loaded into 'data', using
+            the column names of the database. Default: all models.
+        mmap_archives : bool, optional
+            If True zip archives are read through memory maps, which helps
+            when many members of large archives are read. Default: False.
+        cache_dir : str, optional
+            Directory where GYRE models read by 'read_puls_model' are cached
+            with joblib, so repeated reads skip extracting and parsing.
+            Requires joblib. Default: None (no caching).
+        compact : bool, optional
+            If True 'top_dir' and 'log_dir' columns of 'data' are stored as
+            categoricals, which saves memory for large grids. Note that
+            categorical columns do not support string concatenation.
+            Default: False.
         """
 
+        if not os.path.isfile(db_file):
+            raise FileNotFoundError(f"Database '{db_file}' does not exist.")
         self.db_file = db_file
         self.grid_dir = grid_dir
-        engine = create_engine(f'sqlite:///{self.db_file}')
-        self.data = pd.read_sql('models', engine)
+        self.max_open_archives = max_open_archives
+        self._columns = columns
+        self._where = where
+        self.mmap_archives = mmap_archives
+        self.cache_dir = cache_dir
+        self.compact = compact
+        self._zip_cache = OrderedDict()
+        self._logdir_index = {}
+        self._sorted_members = {}
 
     def __str__(self):
         return f"SdbGrid based on '{self.db_file}' database and with models located at '{self.grid_dir}'"
@@ -66,6 +1043,289 @@ class SdbGrid():
     def __repr__(self):
         return f"SdbGrid(db_file={self.db_file}, grid_dir={self.grid_dir})"
 
+    @cached_property
+    def data(self):
+        """Pandas DataFrame containing the grid.
+
+        The table is read on first access, so extracting and reading
+        models does not require loading the database. A Parquet copy of
+        the database created by 'convert_db_to_parquet' is read instead
+        if present, unless models are selected by an SQL condition.
+
+        Returns
+        ----------
+        DataFrame
+            Models of the grid.
+        """
+
+        select_list = self._select_list(self._columns)
+        parquet_file = self.parquet_name(self.db_file)
+        df = None
+        if not self._where and os.path.isfile(parquet_file):
+            try:
+                df = pd.read_parquet(parquet_file, columns=self._columns)
+            except ImportError:
+                pass
+        if df is None:
+            query = f'SELECT {select_list} FROM models'
+            if self._where:
+                query += f' WHERE {self._where}'
+            df = pd.read_sql_query(query, self._conn)
+        if self.compact:
+            df = self._compact(df)
+        return df
+
+    @classmethod
+    def convert_db_to_parquet(cls, db_file):
+        """Saves the models of a database as a Parquet file next to it.
+
+        SdbGrid reads the Parquet file instead of the database when
+        loading 'data', which is considerably faster for large grids.
+        Requires pyarrow.
+
+        Parameters
+        ----------
+        db_file : str
+            Database containing the grid of models.
+
+        Returns
+        ----------
+        str
+            Path to the Parquet file.
+        """
+
+        parquet_file = cls.parquet_name(db_file)
+        with closing(sqlite3.connect(db_file)) as conn:
+            df = pd.read_sql_query('SELECT * FROM models', conn)
+        df.to_parquet(parquet_file, index=False)
+        return parquet_file
+
+    @staticmethod
+    def parquet_name(db_file):
+        """Returns a name of the Parquet copy of a database.
+
+        Parameters
+        ----------
+        db_file : str
+            Database containing the grid of models.
+
+        Returns
+        ----------
+        str
+            Path to the Parquet file.
+        """
+
+        return os.path.splitext(db_file)[0] + '.parquet'
+
+    @staticmethod
+    def _compact(df):
+        """Reduces memory used by a DataFrame with models.
+
+        Directory columns repeat the same few strings for thousands of rows
+        and are stored as categoricals. Numeric columns are left intact.
+
+        Parameters
+        ----------
+        df : DataFrame
+            Models of the grid.
+
+        Returns
+        ----------
+        DataFrame
+            The same DataFrame with compact column types.
+        """
+
+        for column in ('top_dir', 'log_dir'):
+            if column in df:
+                df[column] = df[column].astype('category')
+        return df
+
+    @cached_property
+    def _cached_read_puls_model(self):
+        from joblib import Memory
+
+        return Memory(self.cache_dir, verbose=0).cache(_read_archived_puls_model,
+                                                       ignore=['archive'])
+
+    @cached_property
+    def _conn(self):
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        for pragma in _SQLITE_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @cached_property
+    def _table_columns(self):
+        return [row[1] for row in self._conn.execute('PRAGMA table_info(models)')]
+
+    def _select_list(self, columns):
+        """Returns a list of quoted columns for a SELECT statement.
+
+        Parameters
+        ----------
+        columns : list of str or None
+            Names of columns. If None, all columns are selected.
+
+        Returns
+        ----------
+        str
+            Columns separated by commas.
+        """
+
+        if not columns:
+            return '*'
+        for name in columns:
+            if name not in self._table_columns:
+                raise ValueError(f"Unknown column '{name}'.")
+        return ', '.join(f'"{name}"' for name in columns)
+
+    @cached_property
+    def _key_index(self):
+        df = self.data
+        he4 = _round_he4(df[self.he4_column])
+        rows = np.flatnonzero(np.isfinite(he4))
+        he4_keys = (he4[rows] * 1_000_000).round().astype('int64')
+        return {(top_dir, log_dir, he4_key): i for i, top_dir, log_dir, he4_key
+                in zip(rows.tolist(), df.top_dir.to_numpy()[rows].tolist(),
+                       df.log_dir.to_numpy()[rows].tolist(), he4_keys.tolist())}
+
+    def lookup(self, log_dir, top_dir, he4):
+        """Returns a model from 'data' by its directories and helium abundance.
+
+        An index of the models is built on the first call, later lookups
+        take constant time instead of filtering the whole DataFrame.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4 : float
+            Central helium abundance of the model.
+
+        Returns
+        ----------
+        Series
+            Row of 'data' describing the model.
+        """
+
+        return self.data.iloc[self._key_index[(top_dir, log_dir, _he4_key(he4))]]
+
+    def find_models(self, columns=None, **filters):
+        """Selects models matching the given values directly from the database.
+
+        Filtering is done by SQLite, so only the matching rows are loaded.
+
+        Parameters
+        ----------
+        columns : list of str, optional
+            Columns to select. Default: all columns.
+        **filters
+            Required values of columns. A list or a tuple matches any of
+            its values.
+
+        Returns
+        ----------
+        DataFrame
+            Models matching all the filters.
+
+        Examples
+        ----------
+        >>> g.find_models(top_dir='logs_mi1.0_z0.015_lvl0', custom_profile=[0.5, 0.9])
+        """
+
+        self._select_list(list(filters))
+        conditions = []
+        params = []
+        for name, value in filters.items():
+            if isinstance(value, (list, tuple)):
+                params.extend(value)
+                placeholders = ', '.join('?' * len(value))
+                conditions.append(f'"{name}" IN ({placeholders})')
+            else:
+                params.append(value)
+                conditions.append(f'"{name}" = ?')
+        query = f'SELECT {self._select_list(columns)} FROM models'
+        if conditions:
+            query += ' WHERE ' + ' AND '.join(conditions)
+        return pd.read_sql_query(query, self._conn, params=params)
+
+    def add_model_names(self, df=None):
+        """Adds names of archives and model files as columns of a DataFrame.
+
+        The names are built with vectorized string operations instead of
+        calling the name methods for every row. Adds 'archive_name',
+        'evol_model_name', 'puls_model_name' and 'gyre_input_name' columns.
+
+        Parameters
+        ----------
+        df : DataFrame, optional
+            DataFrame with models of the grid, e.g. returned by
+            'find_models'. Default: 'data'.
+
+        Returns
+        ----------
+        DataFrame
+            The input DataFrame with the added columns.
+        """
+
+        if df is None:
+            df = self.data
+        he4 = df[self.he4_column]
+        df['archive_name'] = 'grid' + df.top_dir.str.slice(4) + '.zip'
+        df['evol_model_name'] = self.evol_model_names(he4)
+        df['puls_model_name'] = self.puls_model_names(he4)
+        df['gyre_input_name'] = self.gyre_input_names(he4)
+        return df
+
+    def create_indices(self):
+        """Creates indices on the columns used to look up models.
+
+        The indices are stored in the database file and speed up
+        'find_models' and loading models selected by 'where'. Creating
+        them takes a while for large grids, so it is done only once,
+        on request. Indices are skipped if the columns are missing or
+        the database is read-only.
+
+        Returns
+        ----------
+        """
+
+        indices = {
+            'ix_models_dirs': ('top_dir', 'log_dir', self.he4_column),
+            'ix_models_initial': ('m_i', 'z_i', 'y_i'),
+        }
+        try:
+            with self._conn:
+                for index, index_columns in indices.items():
+                    if all(name in self._table_columns for name in index_columns):
+                        self._conn.execute(f'CREATE INDEX IF NOT EXISTS {index} ON models '
+                                           f'({self._select_list(index_columns)})')
+        except sqlite3.OperationalError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Closes the database connection and all cached zip archives.
+
+        Both are opened again if the grid is used after closing.
+
+        Returns
+        ----------
+        """
+
+        conn = self.__dict__.pop('_conn', None)
+        if conn is not None:
+            conn.close()
+        while self._zip_cache:
+            self._evict_archive()
+
     def read_history(self, log_dir, top_dir, he4, dest_dir='.', delete_file=True,
                      rename=False, keep_tree=False):
         """Reads a single evolutionary model (a profile) and returns
@@ -83,7 +1343,9 @@ class SdbGrid():
             Temporary dirctory for the required model. Default: '.'.
         delete_file : bool, optional
             If True delete the extracted model. The model is not deleted
-            if 'keep_tree' is True. Default: True.
+            if 'keep_tree' is True. If the model is not already present in
+            'dest_dir', it is extracted to a temporary directory in memory
+            (/dev/shm) when available. Default: True.
         rename : bool, optional
             If True it renames the history file to include information about
             the model contained in log_dir.
@@ -98,12 +1360,16 @@ class SdbGrid():
             Evolutionary model (MESA profile file) as MesaData object.
         """
 
-        history_name = f'history{log_dir[4:]}.data' if rename else 'history.data'
+        import mesa_reader as mesa
+
+        history_name = self._history_name(log_dir, rename)
         if keep_tree:
             file_name = os.path.join(
                 dest_dir, top_dir, log_dir, self.evol_model_name(he4))
         else:
             file_name = os.path.join(dest_dir, history_name)
+        if delete_file and not keep_tree and not self.model_extracted(file_name):
+            return self._read_temporary(log_dir, top_dir, history_name, mesa.MesaData)
         if not self.model_extracted(file_name):
             self.extract_history(log_dir, top_dir, dest_dir, rename, keep_tree)
         data = mesa.MesaData(file_name)
@@ -128,7 +1394,9 @@ class SdbGrid():
             Dirctory for the required model. Default: '.'.
         delete_file : bool, optional
             If True delete the extracted model. The model is not deleted
-            if 'keep_tree' is True. Default: True.
+            if 'keep_tree' is True. If the model is not already present in
+            'dest_dir', it is extracted to a temporary directory in memory
+            (/dev/shm) when available. Default: True.
         keep_tree : bool, optional
             If True extract file with its directory structure (default
             ZipFile.extract behaviour), otherwise extract file directly to
@@ -140,11 +1408,15 @@ class SdbGrid():
             Evolutionary model (MESA profile file) as MesaData object.
         """
 
+        import mesa_reader as mesa
+
         if keep_tree:
             file_name = os.path.join(
                 dest_dir, top_dir, log_dir, self.evol_model_name(he4))
         else:
             file_name = os.path.join(dest_dir, self.evol_model_name(he4))
+        if delete_file and not keep_tree and not self.model_extracted(file_name):
+            return self._read_temporary(log_dir, top_dir, self.evol_model_name(he4), mesa.MesaData)
         if not self.model_extracted(file_name):
             self.extract_evol_model(log_dir, top_dir, he4, dest_dir, keep_tree)
         data = mesa.MesaData(file_name)
@@ -163,35 +1435,153 @@ class SdbGrid():
             Log directory.
         top_dir : str
             Top directory.
-        he4 : float
-            Central helium abundance of the required model.
-        dest_dir : str, optional
-            Temporary dirctory for the required model. Default: '.'.
-        delete_file : bool, optional
-            If True delete the extracted model. The model is not deleted
-            if 'keep_tree' is True. Default: True.
-        keep_tree : bool, optional
-            If True extract file with its directory structure (default
-            ZipFile.extract behaviour), otherwise extract file directly to
-            'dest_dir'. Default: False.
+        he4 : float
+            Central helium abundance of the required model.
+        dest_dir : str, optional
+            Temporary dirctory for the required model. Default: '.'.
+        delete_file : bool, optional
+            If True delete the extracted model. The model is not deleted
+            if 'keep_tree' is True. If the model is not already present in
+            'dest_dir', it is extracted to a temporary directory in memory
+            (/dev/shm) when available, or read from 'cache_dir' if set.
+            Default: True.
+        keep_tree : bool, optional
+            If True extract file with its directory structure (default
+            ZipFile.extract behaviour), otherwise extract file directly to
+            'dest_dir'. Default: False.
+
+        Returns
+        ----------
+        GyreData
+            Pulsation model as GyreData object.
+        """
+
+        import gyre_reader
+
+        if keep_tree:
+            file_name = os.path.join(
+                dest_dir, top_dir, log_dir, self.puls_model_name(he4))
+        else:
+            file_name = os.path.join(dest_dir, self.puls_model_name(he4))
+        if delete_file and not keep_tree and not self.model_extracted(file_name):
+            if self.cache_dir is not None:
+                grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
+                grid_zip_path = f"{top_dir}/{log_dir}/{self.puls_model_name(he4)}"
+                archive = self._get_archive(grid_zip_file)
+                return self._cached_read_puls_model(archive, grid_zip_file, grid_zip_path,
+                                                    archive.getinfo(grid_zip_path).CRC)
+            return self._read_temporary(log_dir, top_dir, self.puls_model_name(he4),
+                                        gyre_reader.GyreData)
+        if not self.model_extracted(file_name):
+            self.extract_puls_model(log_dir, top_dir, he4, dest_dir, keep_tree)
+        data = gyre_reader.GyreData(file_name)
+        if delete_file and not keep_tree:
+            os.remove(file_name)
+        return data
+
+    def read_many_puls(self, items, max_workers=None):
+        """Reads several calculated GYRE models using a pool of threads.
+
+        Models are extracted and parsed in parallel, every thread with its
+        own handles to the archives, through a temporary directory in
+        memory (/dev/shm) when available. The models are yielded in the
+        order of 'items'.
+
+        Parameters
+        ----------
+        items : iterable of tuple
+            Models to read as (log_dir, top_dir, he4) tuples.
+        max_workers : int, optional
+            Number of worker threads. Default: number of CPUs.
+
+        Yields
+        ----------
+        tuple
+            (log_dir, top_dir, he4) tuple of a model.
+        GyreData
+            Pulsation model as GyreData object.
+
+        Examples
+        ----------
+        >>> items = [(log_dir, top_dir, he4) for he4 in (0.5, 0.4, 0.3)]
+        >>> for (log_dir, top_dir, he4), data in g.read_many_puls(items):
+        ...     print(he4, data)
+        """
+
+        import gyre_reader
+
+        def read_one(indexed_item):
+            index, (log_dir, top_dir, he4) = indexed_item
+            grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
+            model_name = self.puls_model_name(he4)
+            model_dir = os.path.join(tmp_dir, str(index))
+            os.mkdir(model_dir)
+            tmp_path = os.path.join(model_dir, model_name)
+            _extract_member(archives.get(grid_zip_file), f"{top_dir}/{log_dir}/{model_name}",
+                            tmp_path)
+            data = gyre_reader.GyreData(tmp_path)
+            os.remove(tmp_path)
+            os.rmdir(model_dir)
+            return (log_dir, top_dir, he4), data
+
+        with tempfile.TemporaryDirectory(dir=_SCRATCH_DIR) as tmp_dir, _ThreadArchives() as archives, \
+                ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            yield from executor.map(read_one, enumerate(items))
+
+    def read_bytes(self, log_dir, top_dir, file_name):
+        """Reads a file from the archive into memory without extracting it.
+
+        Useful for parsers accepting file-like objects, e.g.
+        'np.loadtxt(io.BytesIO(data))'.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        file_name : str
+            Name of the file in the log directory, e.g. returned by
+            'puls_model_name'.
+
+        Returns
+        ----------
+        bytes
+            Decompressed content of the file.
+        """
+
+        archive = self._open_archive(top_dir)
+        return archive.read(f"{top_dir}/{log_dir}/{file_name}")
+
+    def _read_temporary(self, log_dir, top_dir, file_name, reader):
+        """Reads a file from the archive through a temporary copy.
+
+        The copy is placed in a RAM-backed directory if available, since
+        MesaData and GyreData can only read files given by their paths.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        file_name : str
+            Name of the file in the log directory.
+        reader : callable
+            Function reading the file from a path.
 
         Returns
         ----------
-        GyreData
-            Pulsation model as GyreData object.
+        object
+            Object returned by 'reader'.
         """
 
-        if keep_tree:
-            file_name = os.path.join(
-                dest_dir, top_dir, log_dir, self.puls_model_name(he4))
-        else:
-            file_name = os.path.join(dest_dir, self.puls_model_name(he4))
-        if not self.model_extracted(file_name):
-            self.extract_puls_model(log_dir, top_dir, he4, dest_dir, keep_tree)
-        data = gyre_reader.GyreData(file_name)
-        if delete_file and not keep_tree:
-            os.remove(file_name)
-        return data
+        grid_zip_path = f"{top_dir}/{log_dir}/{file_name}"
+        archive = self._open_archive(top_dir)
+        with tempfile.TemporaryDirectory(dir=_SCRATCH_DIR) as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, file_name)
+            _extract_member(archive, grid_zip_path, tmp_path)
+            return reader(tmp_path)
 
     def extract_history(self, log_dir, top_dir, dest_dir, rename=False, keep_tree=False):
         """Extracts a MESA history file.
@@ -217,17 +1607,88 @@ class SdbGrid():
         ----------
         """
 
+        history_name = self._history_name(log_dir, rename)
+        grid_zip_path = f"{top_dir}/{log_dir}/{history_name}"
+        dest_path = os.path.join(dest_dir, history_name)
+
+        archive = self._open_archive(top_dir)
+        if keep_tree:
+            _extract_member_tree(archive, grid_zip_path, dest_dir)
+        else:
+            _extract_member(archive, grid_zip_path, dest_path)
+
+    def extract_history_parallel(self, log_dir, top_dir, dest_dir, rename=False, threads=None):
+        """Extracts a MESA history file decompressing its blocks in parallel.
+
+        Requires an archive rewritten by 'repack_archive', otherwise
+        the file is extracted by 'extract_history'. Blocks are decompressed
+        ahead of writing by at most twice the number of threads, so memory
+        use does not grow with the size of the file.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        dest_dir : str
+            Destination directory for the extracted file.
+        rename : bool
+            If True it renames the history file to include information about
+            the model contained in log_dir. Default: False.
+        threads : int, optional
+            Number of threads. Default: number of CPUs.
+
+        Returns
+        ----------
+        """
+
         grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
-        history_name = f'history{log_dir[4:]}.data' if rename else 'history.data'
-        grid_zip_path = os.path.join(top_dir, log_dir, history_name)
+        history_name = self._history_name(log_dir, rename)
+        grid_zip_path = f"{top_dir}/{log_dir}/{history_name}"
+        index_path = grid_zip_path + _BLOCK_INDEX_SUFFIX
         dest_path = os.path.join(dest_dir, history_name)
 
-        with ZipFile(grid_zip_file) as archive:
-            if keep_tree:
-                archive.extract(grid_zip_path, dest_dir)
-            else:
-                with archive.open(grid_zip_path) as zipped_file, open(dest_path, 'wb') as dest_file:
-                    shutil.copyfileobj(zipped_file, dest_file)
+        archive = self._get_archive(grid_zip_file)
+        info = archive.getinfo(grid_zip_path)
+        if (not _has_member(archive, index_path) or not _is_block_index(archive.getinfo(index_path))
+                or info.compress_type != ZIP_DEFLATED or info.flag_bits & 0x1):
+            self.extract_history(log_dir, top_dir, dest_dir, rename)
+            return
+        starts = [tuple(boundary) for boundary in json.loads(archive.read(index_path))['boundaries']]
+        ends = starts[1:] + [(info.compress_size, info.file_size)]
+
+        with open(grid_zip_file, 'rb') as zip_file, \
+                mmap.mmap(zip_file.fileno(), 0, access=mmap.ACCESS_READ) as zip_map:
+            data_offset = _member_data_offset(
+                zip_map[info.header_offset:info.header_offset + _LOCAL_HEADER_SIZE], info)
+
+            def inflate(block):
+                (compressed_start, start), (compressed_end, end) = block
+                data = zlib.decompressobj(-15).decompress(
+                    zip_map[data_offset + compressed_start:data_offset + compressed_end])
+                if len(data) != end - start:
+                    raise BadZipFile(f"Bad block index of '{grid_zip_path}'.")
+                return data
+
+            # Blocks are written in order and only twice as many blocks as
+            # threads are decompressed ahead, which bounds the memory used.
+            threads = threads or os.cpu_count()
+            blocks = zip(starts, ends)
+            crc = 0
+            with ThreadPoolExecutor(max_workers=threads) as executor, \
+                    open(dest_path, 'wb') as dest_file:
+                _preallocate(dest_file.fileno(), info.file_size)
+                pending = deque(executor.submit(inflate, block)
+                                for block in islice(blocks, 2 * threads))
+                while pending:
+                    data = pending.popleft().result()
+                    for block in islice(blocks, 1):
+                        pending.append(executor.submit(inflate, block))
+                    crc = zlib.crc32(data, crc)
+                    dest_file.write(data)
+        if crc != info.CRC:
+            raise BadZipFile(f"Bad CRC-32 for file '{grid_zip_path}'.")
 
     def extract_evol_model(self, log_dir, top_dir, he4, dest_dir, keep_tree=False):
         """Extracts a single evolutionary model (a profile).
@@ -252,18 +1713,16 @@ class SdbGrid():
         ----------
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.evol_model_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
         dest_path = os.path.join(dest_dir, model_name)
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                if keep_tree:
-                    archive.extract(grid_zip_path, dest_dir)
-                else:
-                    with archive.open(grid_zip_path) as zipped_file, open(dest_path, 'wb') as dest_file:
-                        shutil.copyfileobj(zipped_file, dest_file)
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            if keep_tree:
+                _extract_member_tree(archive, grid_zip_path, dest_dir)
+            else:
+                _extract_member(archive, grid_zip_path, dest_path)
 
     def extract_puls_model(self, log_dir, top_dir, he4, dest_dir, keep_tree=False):
         """Extracts a single calculated GYRE model.
@@ -288,18 +1747,16 @@ class SdbGrid():
         ----------
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.puls_model_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
         dest_path = os.path.join(dest_dir, model_name)
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                if keep_tree:
-                    archive.extract(grid_zip_path, dest_dir)
-                else:
-                    with archive.open(grid_zip_path) as zipped_file, open(dest_path, 'wb') as dest_file:
-                        shutil.copyfileobj(zipped_file, dest_file)
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            if keep_tree:
+                _extract_member_tree(archive, grid_zip_path, dest_dir)
+            else:
+                _extract_member(archive, grid_zip_path, dest_path)
 
     def extract_gyre_input_model(self, log_dir, top_dir, he4, dest_dir, keep_tree=False):
         """Extracts a single GYRE input model.
@@ -324,22 +1781,225 @@ class SdbGrid():
         ----------
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.gyre_input_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
         dest_path = os.path.join(dest_dir, model_name)
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                if keep_tree:
-                    archive.extract(grid_zip_path, dest_dir)
-                else:
-                    with archive.open(grid_zip_path) as zipped_file, open(dest_path, 'wb') as dest_file:
-                        shutil.copyfileobj(zipped_file, dest_file)
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            if keep_tree:
+                _extract_member_tree(archive, grid_zip_path, dest_dir)
+            else:
+                _extract_member(archive, grid_zip_path, dest_path)
+
+    def extract_evol_models(self, log_dir, top_dir, he4_list, dest_dir, max_workers=None,
+                            backend='thread'):
+        """Extracts several evolutionary models (profiles) in parallel.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4_list : list of float
+            Central helium abundances of the required models.
+        dest_dir : str
+            Destination directory for the extracted models.
+        max_workers : int, optional
+            Number of workers. Default: number of CPUs.
+        backend : str, optional
+            Extraction backend, either 'thread' or 'process'. Default: 'thread'.
+
+        Returns
+        ----------
+        """
+
+        self._extract_models(log_dir, top_dir, he4_list, dest_dir,
+                             self.evol_model_names, max_workers, backend)
+
+    def extract_puls_models(self, log_dir, top_dir, he4_list, dest_dir, max_workers=None,
+                            backend='thread'):
+        """Extracts several calculated GYRE models in parallel.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4_list : list of float
+            Central helium abundances of the required models.
+        dest_dir : str
+            Destination directory for the extracted models.
+        max_workers : int, optional
+            Number of workers. Default: number of CPUs.
+        backend : str, optional
+            Extraction backend, either 'thread' or 'process'. Default: 'thread'.
+
+        Returns
+        ----------
+        """
+
+        self._extract_models(log_dir, top_dir, he4_list, dest_dir,
+                             self.puls_model_names, max_workers, backend)
+
+    def extract_gyre_input_models(self, log_dir, top_dir, he4_list, dest_dir, max_workers=None,
+                                  backend='thread'):
+        """Extracts several GYRE input models in parallel.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4_list : list of float
+            Central helium abundances of the required models.
+        dest_dir : str
+            Destination directory for the extracted files.
+        max_workers : int, optional
+            Number of workers. Default: number of CPUs.
+        backend : str, optional
+            Extraction backend, either 'thread' or 'process'. Default: 'thread'.
+
+        Returns
+        ----------
+        """
+
+        self._extract_models(log_dir, top_dir, he4_list, dest_dir,
+                             self.gyre_input_names, max_workers, backend)
+
+    def extract_evol_models_streaming(self, log_dir, top_dir, he4_list, dest_dir,
+                                      max_workers=None, max_pending=4):
+        """Extracts several evolutionary models (profiles), overlapping
+        reading and decompression with writing.
+
+        The calling thread reads and inflates the models one by one, while
+        a pool of threads writes the already decompressed ones. At most
+        'max_pending' decompressed models are kept in memory. Useful if
+        'grid_dir' or 'dest_dir' are located on slow or remote storage.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4_list : list of float
+            Central helium abundances of the required models.
+        dest_dir : str
+            Destination directory for the extracted models.
+        max_workers : int, optional
+            Number of writing threads. Default: number of CPUs.
+        max_pending : int, optional
+            Maximum number of decompressed models waiting to be written.
+            Default: 4.
+
+        Returns
+        ----------
+        """
+
+        archive = self._open_archive(top_dir)
+        pending = threading.BoundedSemaphore(max_pending)
+
+        def write(dest_path, chunks):
+            try:
+                with open(dest_path, 'wb') as dest_file:
+                    dest_file.writelines(chunks)
+            finally:
+                pending.release()
+
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            for he4 in he4_list:
+                model_name = self.evol_model_name(he4)
+                grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
+                if not _has_member(archive, grid_zip_path):
+                    continue
+                pending.acquire()
+                try:
+                    chunks = []
+                    with archive.open(grid_zip_path) as zipped_file:
+                        chunk = zipped_file.read1(_COPY_BUFSIZE)
+                        while chunk:
+                            chunks.append(chunk)
+                            chunk = zipped_file.read1(_COPY_BUFSIZE)
+                except BaseException:
+                    pending.release()
+                    raise
+                futures.append(executor.submit(
+                    write, os.path.join(dest_dir, model_name), chunks))
+        for future in futures:
+            future.result()
+
+    def _extract_models(self, log_dir, top_dir, he4_list, dest_dir, name_func, max_workers=None,
+                        backend='thread'):
+        """Extracts several models from a log directory using a pool of workers.
+
+        Entries of a zip archive are compressed independently and zlib
+        releases the GIL while inflating, so the models are decompressed
+        concurrently. A ZipFile is not safe for concurrent reads, hence
+        every worker thread opens its own handle to the archive. On POSIX
+        systems the handles share one file descriptor. The 'process'
+        backend extracts in separate processes, each with its own handle,
+        which avoids the GIL in the Python part of the extraction. Models
+        missing from the archive are skipped.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        he4_list : list of float
+            Central helium abundances of the required models.
+        dest_dir : str
+            Destination directory for the extracted models.
+        name_func : callable
+            Function returning file names for an array of helium abundances.
+        max_workers : int, optional
+            Number of workers. Default: number of CPUs.
+        backend : str, optional
+            Extraction backend, either 'thread' or 'process'. Default: 'thread'.
+
+        Returns
+        ----------
+        """
+
+        if backend not in _EXTRACTION_BACKENDS:
+            raise ValueError(f"Unknown extraction backend '{backend}', "
+                             f"expected one of {_EXTRACTION_BACKENDS}.")
 
-    def extract_log_dir(self, log_dir, top_dir, dest_dir):
+        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
+        archive = self._get_archive(grid_zip_file)
+        model_names = [model_name for model_name in name_func(he4_list).tolist()
+                       if _has_member(archive, f"{top_dir}/{log_dir}/{model_name}")]
+        max_workers = max_workers or os.cpu_count()
+
+        if backend == 'process':
+            grid_zip_paths = [f"{top_dir}/{log_dir}/{model_name}" for model_name in model_names]
+            dest_paths = [os.path.join(dest_dir, model_name) for model_name in model_names]
+            with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker_archive,
+                                     initargs=(grid_zip_file,)) as executor:
+                list(executor.map(_extract_worker_member, grid_zip_paths, dest_paths,
+                                  chunksize=max(1, len(model_names) // (4 * max_workers))))
+            return
+
+        def extract_one(model_name):
+            grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
+            dest_path = os.path.join(dest_dir, model_name)
+            _extract_member(archives.get(grid_zip_file), grid_zip_path, dest_path)
+
+        with _ThreadArchives() as archives, ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(extract_one, model_names))
+
+    def extract_log_dir(self, log_dir, top_dir, dest_dir, max_workers=None):
         """Extracts a MESA log directory.
 
+        The directory tree is created once, then files are extracted
+        in parallel threads.
+
         Parameters
         ----------
         log_dir : str
@@ -348,18 +2008,125 @@ class SdbGrid():
             Top directory.
         dest_dir : str
             Destination directory for the extracted directory tree.
+        max_workers : int, optional
+            Number of threads. Default: number of CPUs.
 
         Returns
         ----------
         """
 
+        grid_zip_path = f"{top_dir}/{log_dir}/"
         grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
-        grid_zip_path = os.path.join(top_dir, log_dir)
 
-        with ZipFile(grid_zip_file) as archive:
-            for f_name in archive.namelist():
-                if f_name.startswith(grid_zip_path):
-                    archive.extract(f_name, dest_dir)
+        infos = [info for info in self._members_with_prefix(grid_zip_file, grid_zip_path)
+                 if not _is_block_index(info)]
+
+        members = [(info.filename, _member_dest_path(dest_dir, info.filename))
+                   for info in infos if not info.is_dir()]
+        dest_dirs = {_member_dest_path(dest_dir, info.filename) for info in infos if info.is_dir()}
+        dest_dirs.update(os.path.dirname(dest_path) for _, dest_path in members)
+        for directory in sorted(dest_dirs):
+            os.makedirs(directory, exist_ok=True)
+
+        def extract_one(member):
+            _extract_member(archives.get(grid_zip_file), *member)
+
+        with _ThreadArchives() as archives, \
+                ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            list(executor.map(extract_one, members))
+
+    def _members_with_prefix(self, grid_zip_file, prefix):
+        """Returns members of an archive with names starting with a prefix.
+
+        Members are sorted by name on the first call for an archive, later
+        calls find the matching range by bisection. The sorted members are
+        dropped when the archive is closed.
+
+        Parameters
+        ----------
+        grid_zip_file : str
+            Path to the zip archive.
+        prefix : str
+            Prefix of member names, e.g. 'top_dir/log_dir/'.
+
+        Returns
+        ----------
+        list of ZipInfo
+            Matching members.
+        """
+
+        if grid_zip_file not in self._sorted_members:
+            infos = sorted(self._get_archive(grid_zip_file).infolist(), key=lambda info: info.filename)
+            self._sorted_members[grid_zip_file] = ([info.filename for info in infos], infos)
+        names, infos = self._sorted_members[grid_zip_file]
+        start = bisect_left(names, prefix)
+        stop = bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+        return infos[start:stop]
+
+    def available_he4(self, log_dir, top_dir, kind='evol'):
+        """Returns helium abundances of all models present in a log directory.
+
+        The archive is indexed on the first call, later calls for any log
+        directory of the same top directory are dictionary lookups. The
+        index is dropped when the archive is closed.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        top_dir : str
+            Top directory.
+        kind : str, optional
+            Kind of models: 'evol' (MESA profiles), 'puls' (calculated GYRE
+            models) or 'gyre_input' (GYRE input models). Default: 'evol'.
+
+        Returns
+        ----------
+        list of float
+            Sorted central helium abundances of the models.
+        """
+
+        if kind not in _MODEL_NAME_PATTERNS:
+            raise ValueError(f"Unknown kind of models '{kind}', "
+                             f"expected one of {tuple(_MODEL_NAME_PATTERNS)}.")
+        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
+        if grid_zip_file not in self._logdir_index:
+            self._build_logdir_index(grid_zip_file)
+        he4_keys = self._logdir_index[grid_zip_file].get((top_dir, log_dir), {}).get(kind, [])
+        return [he4_key / 1_000_000 for he4_key in he4_keys]
+
+    def _build_logdir_index(self, grid_zip_file):
+        """Indexes helium abundances of models present in an archive
+        by their top and log directories.
+
+        Parameters
+        ----------
+        grid_zip_file : str
+            Path to the zip archive.
+
+        Returns
+        ----------
+        """
+
+        index = {}
+        for info in self._get_archive(grid_zip_file).infolist():
+            parts = info.filename.split('/')
+            if len(parts) != 3:
+                continue
+            top_dir, log_dir, file_name = parts
+            for kind, pattern in _MODEL_NAME_PATTERNS.items():
+                match = pattern.match(file_name)
+                if match:
+                    try:
+                        he4_key = _he4_key(float(match.group(1)))
+                    except ValueError:
+                        continue
+                    index.setdefault((top_dir, log_dir), {}).setdefault(kind, []).append(he4_key)
+                    break
+        for models in index.values():
+            for he4_keys in models.values():
+                he4_keys.sort()
+        self._logdir_index[grid_zip_file] = index
 
     def evol_model_exists(self, log_dir, top_dir, he4):
         """Checks if a profile exists in archive.
@@ -379,15 +2146,14 @@ class SdbGrid():
             True if a profile exists, False otherwise.
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.evol_model_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                return True
-            else:
-                return False
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            return True
+        else:
+            return False
 
     def puls_model_exists(self, log_dir, top_dir, he4):
         """Checks if a calculated GYRE model exists in archive.
@@ -407,15 +2173,14 @@ class SdbGrid():
             True if a profile exists, False otherwise.
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.puls_model_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                return True
-            else:
-                return False
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            return True
+        else:
+            return False
 
     def gyre_input_exists(self, log_dir, top_dir, he4):
         """Checks if a GYRE input model exists in archive.
@@ -435,15 +2200,79 @@ class SdbGrid():
             True if a profile exists, False otherwise.
         """
 
-        grid_zip_file = os.path.join(self.grid_dir, self.archive_name(top_dir))
         model_name = self.gyre_input_name(he4)
-        grid_zip_path = os.path.join(top_dir, log_dir, model_name)
+        grid_zip_path = f"{top_dir}/{log_dir}/{model_name}"
 
-        with ZipFile(grid_zip_file) as archive:
-            if grid_zip_path in archive.namelist():
-                return True
-            else:
-                return False
+        archive = self._open_archive(top_dir)
+        if _has_member(archive, grid_zip_path):
+            return True
+        else:
+            return False
+
+    def _open_archive(self, top_dir):
+        """Returns the open zip archive containing a top directory.
+
+        Parameters
+        ----------
+        top_dir : str
+            Top directory.
+
+        Returns
+        ----------
+        ZipFile
+            Open zip archive.
+        """
+
+        return self._get_archive(os.path.join(self.grid_dir, self.archive_name(top_dir)))
+
+    def _get_archive(self, grid_zip_file):
+        """Returns an open zip archive, reusing a cached handle if possible.
+
+        Least recently used archives are closed before a new one is cached,
+        so at most 'max_open_archives' archives stay open, but always at
+        least the returned one.
+
+        Parameters
+        ----------
+        grid_zip_file : str
+            Path to the zip archive.
+
+        Returns
+        ----------
+        ZipFile
+            Open zip archive.
+        """
+
+        archive = self._zip_cache.get(grid_zip_file)
+        if archive is not None:
+            self._zip_cache.move_to_end(grid_zip_file)
+            return archive
+        if self.mmap_archives:
+            zip_file = _MappedFile(grid_zip_file)
+            try:
+                archive = ZipFile(zip_file)
+            except BaseException:
+                zip_file.close()
+                raise
+        else:
+            archive = ZipFile(grid_zip_file)
+        while self._zip_cache and len(self._zip_cache) >= self.max_open_archives:
+            self._evict_archive()
+        self._zip_cache[grid_zip_file] = archive
+        return archive
+
+    def _evict_archive(self):
+        """Closes the least recently used cached archive and drops
+        the indices of its members.
+
+        Returns
+        ----------
+        """
+
+        grid_zip_file, archive = self._zip_cache.popitem(last=False)
+        _close_archive(archive)
+        self._logdir_index.pop(grid_zip_file, None)
+        self._sorted_members.pop(grid_zip_file, None)
 
     @staticmethod
     def model_extracted(path):
@@ -466,6 +2295,7 @@ class SdbGrid():
             return False
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def archive_name(top_dir):
         """Returns a name of a zip file containing a top direcotry.
 
@@ -482,6 +2312,26 @@ class SdbGrid():
 
         return f"grid{top_dir[4:]}.zip"
 
+    @staticmethod
+    def _history_name(log_dir, rename=False):
+        """Returns a name of a MESA history file in a log directory.
+
+        Parameters
+        ----------
+        log_dir : str
+            Log directory.
+        rename : bool, optional
+            If True the name includes information about the model
+            contained in log_dir. Default: False.
+
+        Returns
+        ----------
+        str
+            Name of history file.
+        """
+
+        return f'history{log_dir[4:]}.data' if rename else 'history.data'
+
     @staticmethod
     def evol_model_name(he4):
         """Returns a name of a MESA profile for helium abundance 'he4'.
@@ -497,7 +2347,26 @@ class SdbGrid():
             Name of MESA profile.
         """
 
-        return f"custom_He{round(he4, 6)}.data"
+        return _model_name(he4, '.data')
+
+    @staticmethod
+    def evol_model_names(he4):
+        """Returns names of MESA profiles for an array of helium abundances.
+
+        Vectorized version of 'evol_model_name'.
+
+        Parameters
+        ----------
+        he4 : array_like
+            Central helium abundances.
+
+        Returns
+        ----------
+        ndarray of str
+            Names of MESA profiles.
+        """
+
+        return _model_names(he4, '.data')
 
     @staticmethod
     def puls_model_name(he4):
@@ -514,7 +2383,26 @@ class SdbGrid():
             Name of calculated GYRE model.
         """
 
-        return f"custom_He{round(he4, 6)}_summary.txt"
+        return _model_name(he4, '_summary.txt')
+
+    @staticmethod
+    def puls_model_names(he4):
+        """Returns names of calculated GYRE models for an array of helium abundances.
+
+        Vectorized version of 'puls_model_name'.
+
+        Parameters
+        ----------
+        he4 : array_like
+            Central helium abundances.
+
+        Returns
+        ----------
+        ndarray of str
+            Names of calculated GYRE models.
+        """
+
+        return _model_names(he4, '_summary.txt')
 
     @staticmethod
     def gyre_input_name(he4):
@@ -531,10 +2419,31 @@ class SdbGrid():
             Name of GYRE input model.
         """
 
-        return f"custom_He{round(he4, 6)}.data.GYRE"
+        return _model_name(he4, '.data.GYRE')
+
+    @staticmethod
+    def gyre_input_names(he4):
+        """Returns names of GYRE input models for an array of helium abundances.
+
+        Vectorized version of 'gyre_input_name'.
+
+        Parameters
+        ----------
+        he4 : array_like
+            Central helium abundances.
+
+        Returns
+        ----------
+        ndarray of str
+            Names of GYRE input models.
+        """
+
+        return _model_names(he4, '.data.GYRE')
 
 
 if __name__ == "__main__":
+    import matplotlib.pyplot as plt
+
     database = '/Users/cespenar/sdb/sdb_grid_cpm.db'
     grid_dir = '/Volumes/T3_2TB/sdb/grid_sdb'
     g = SdbGrid(database, grid_dir)
@@ -8,4 +8,5 @@ setup(name='sdb_grid_reader',
     author_email='cespenar1@gmail.com',
     license='MIT',
     packages=['sdb_grid_reader'],
-    install_requires=['mesa_reader', 'sqlalchemy', 'gyre_reader'])
+    install_requires=['mesa_reader', 'numpy', 'pandas', 'gyre_reader'],
+    extras_require={'parquet': ['pyarrow'], 'cache': ['joblib']})
@@ -0,0 +1,179 @@
+import os
+import random
+import sqlite3
+import zlib
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+import pytest
+
+from sdb_grid_reader import (_LOCAL_HEADER_SIZE, _member_data_offset, SdbGrid,
+                             repack_archive)
+
+TOP_DIR = 'logs_mi1.0_z0.015'
+LOG_DIR = 'logs_mi1.0_menv0.0001'
+
+
+def history_data(size):
+    rng = random.Random(size)
+    lines = []
+    while size > 0:
+        lines.append(f'{len(lines)} {rng.random():.12f} {rng.random():.12f}\n'.encode())
+        size -= len(lines[-1])
+    return b''.join(lines)
+
+
+@pytest.fixture
+def grid(tmp_path):
+    db_file = tmp_path / 'grid.db'
+    with sqlite3.connect(db_file) as conn:
+        conn.execute('CREATE TABLE models (top_dir TEXT, log_dir TEXT, custom_profile REAL)')
+        conn.execute('INSERT INTO models VALUES (?, ?, ?)', (TOP_DIR, LOG_DIR, 0.5))
+    conn.close()
+    grid_dir = tmp_path / 'grid'
+    grid_dir.mkdir()
+    with SdbGrid(str(db_file), str(grid_dir)) as g:
+        yield g
+
+
+def grid_zip_file(g):
+    return os.path.join(g.grid_dir, g.archive_name(TOP_DIR))
+
+
+def test_repack_round_trip(grid, tmp_path):
+    history = history_data(3 * 1024 * 1024)
+    src_zip_file = str(tmp_path / 'src.zip')
+    with ZipFile(src_zip_file, 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', history, ZIP_DEFLATED)
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/custom_He0.5.data', b'profile\n' * 100,
+                         ZIP_STORED)
+
+    repack_archive(src_zip_file, grid_zip_file(grid), min_size=1024 * 1024,
+                   block_size=256 * 1024)
+
+    with ZipFile(grid_zip_file(grid)) as archive:
+        assert archive.testzip() is None
+        assert f'{TOP_DIR}/{LOG_DIR}/history.data.idx' in archive.namelist()
+        info = archive.getinfo(f'{TOP_DIR}/{LOG_DIR}/custom_He0.5.data')
+        assert info.compress_type == ZIP_STORED
+    dest_dir = tmp_path / 'parallel'
+    dest_dir.mkdir()
+    grid.extract_history_parallel(LOG_DIR, TOP_DIR, str(dest_dir), threads=4)
+    assert (dest_dir / 'history.data').read_bytes() == history
+    grid.extract_history(LOG_DIR, TOP_DIR, str(tmp_path))
+    assert (tmp_path / 'history.data').read_bytes() == history
+    grid.extract_log_dir(LOG_DIR, TOP_DIR, str(tmp_path / 'tree'))
+    assert not (tmp_path / 'tree' / TOP_DIR / LOG_DIR / 'history.data.idx').exists()
+
+
+def test_extract_history_parallel_without_index(grid, tmp_path):
+    history = history_data(512 * 1024)
+    with ZipFile(grid_zip_file(grid), 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', history, ZIP_DEFLATED)
+
+    grid.extract_history_parallel(LOG_DIR, TOP_DIR, str(tmp_path))
+    assert (tmp_path / 'history.data').read_bytes() == history
+
+
+@pytest.mark.parametrize('keep_tree', [False, True])
+def test_extract_stored_member(grid, tmp_path, keep_tree):
+    profile = history_data(2 * 1024 * 1024)
+    info = ZipInfo(f'{TOP_DIR}/{LOG_DIR}/custom_He0.5.data')
+    info.compress_type = ZIP_STORED
+    # An extra field in the local header shifts the start of the data.
+    info.extra = b'\xfe\xca\x04\x00test'
+    with ZipFile(grid_zip_file(grid), 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', b'history\n', ZIP_STORED)
+        archive.writestr(info, profile)
+
+    grid.extract_evol_model(LOG_DIR, TOP_DIR, 0.5, str(tmp_path), keep_tree=keep_tree)
+    if keep_tree:
+        dest_path = tmp_path / TOP_DIR / LOG_DIR / 'custom_He0.5.data'
+    else:
+        dest_path = tmp_path / 'custom_He0.5.data'
+    assert dest_path.read_bytes() == profile
+
+
+def test_member_data_offset(tmp_path):
+    zip_file = str(tmp_path / 'members.zip')
+    info = ZipInfo('extra.txt')
+    info.extra = b'\xfe\xca\x02\x00ab'
+    with ZipFile(zip_file, 'w') as archive:
+        archive.writestr('stored.txt', b'stored', ZIP_STORED)
+        archive.writestr('deflated.txt', b'deflated' * 10, ZIP_DEFLATED)
+        archive.writestr(info, b'extra')
+
+    with ZipFile(zip_file) as archive, open(zip_file, 'rb') as raw:
+        for info in archive.infolist():
+            raw.seek(info.header_offset)
+            raw.seek(_member_data_offset(raw.read(_LOCAL_HEADER_SIZE), info))
+            data = raw.read(info.compress_size)
+            if info.compress_type == ZIP_DEFLATED:
+                data = zlib.decompress(data, -15)
+            assert data == archive.read(info)
+
+
+def test_member_data_offset_bad_header():
+    info = ZipInfo('member.txt')
+    with pytest.raises(ValueError):
+        _member_data_offset(b'\x00' * _LOCAL_HEADER_SIZE, info)
+
+
+def test_idx_files_are_not_block_indices(grid, tmp_path):
+    photo_index = f'{TOP_DIR}/{LOG_DIR}/photos/model.idx'
+    history = history_data(2 * 1024 * 1024)
+    src_zip_file = str(tmp_path / 'src.zip')
+    with ZipFile(src_zip_file, 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', history, ZIP_DEFLATED)
+        archive.writestr(photo_index, b'photo index')
+
+    repack_archive(src_zip_file, grid_zip_file(grid), min_size=1024 * 1024,
+                   block_size=256 * 1024)
+    # Repacking again replaces the block index instead of duplicating it.
+    repacked_zip_file = str(tmp_path / 'repacked.zip')
+    os.replace(grid_zip_file(grid), repacked_zip_file)
+    repack_archive(repacked_zip_file, grid_zip_file(grid), min_size=1024 * 1024,
+                   block_size=256 * 1024)
+
+    with ZipFile(grid_zip_file(grid)) as archive:
+        assert archive.testzip() is None
+        assert archive.read(photo_index) == b'photo index'
+        assert archive.namelist().count(f'{TOP_DIR}/{LOG_DIR}/history.data.idx') == 1
+    grid.extract_history_parallel(LOG_DIR, TOP_DIR, str(tmp_path))
+    assert (tmp_path / 'history.data').read_bytes() == history
+    grid.extract_log_dir(LOG_DIR, TOP_DIR, str(tmp_path / 'tree'))
+    assert (tmp_path / 'tree' / photo_index).read_bytes() == b'photo index'
+    assert not (tmp_path / 'tree' / TOP_DIR / LOG_DIR / 'history.data.idx').exists()
+
+
+def test_existing_idx_file_is_kept(grid, tmp_path):
+    history = history_data(2 * 1024 * 1024)
+    src_zip_file = str(tmp_path / 'src.zip')
+    with ZipFile(src_zip_file, 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', history, ZIP_DEFLATED)
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data.idx', b'not a block index')
+
+    repack_archive(src_zip_file, grid_zip_file(grid), min_size=1024 * 1024,
+                   block_size=256 * 1024)
+
+    with ZipFile(grid_zip_file(grid)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist().count(f'{TOP_DIR}/{LOG_DIR}/history.data.idx') == 1
+        assert archive.read(f'{TOP_DIR}/{LOG_DIR}/history.data.idx') == b'not a block index'
+    grid.extract_history_parallel(LOG_DIR, TOP_DIR, str(tmp_path))
+    assert (tmp_path / 'history.data').read_bytes() == history
+    grid.extract_log_dir(LOG_DIR, TOP_DIR, str(tmp_path / 'tree'))
+    assert ((tmp_path / 'tree' / TOP_DIR / LOG_DIR / 'history.data.idx').read_bytes()
+            == b'not a block index')
+
+
+def test_extract_history_parallel_many_blocks(grid, tmp_path):
+    history = history_data(3 * 1024 * 1024)
+    src_zip_file = str(tmp_path / 'src.zip')
+    with ZipFile(src_zip_file, 'w') as archive:
+        archive.writestr(f'{TOP_DIR}/{LOG_DIR}/history.data', history, ZIP_DEFLATED)
+
+    repack_archive(src_zip_file, grid_zip_file(grid), min_size=1024 * 1024,
+                   block_size=16 * 1024)
+
+    grid.extract_history_parallel(LOG_DIR, TOP_DIR, str(tmp_path), threads=2)
+    assert (tmp_path / 'history.data').read_bytes() == history
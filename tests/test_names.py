@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from sdb_grid_reader import SdbGrid, _model_name
+
+NAME_METHODS = [
+    (SdbGrid.evol_model_name, '.data'),
+    (SdbGrid.puls_model_name, '_summary.txt'),
+    (SdbGrid.gyre_input_name, '.data.GYRE'),
+]
+
+
+@pytest.mark.parametrize('name_method, suffix', NAME_METHODS)
+@pytest.mark.parametrize('he4_values', [(0, 0.0, 1, 1.0), (0.0, 0, 1.0, 1)])
+def test_model_name_int_and_float(name_method, suffix, he4_values):
+    _model_name.cache_clear()
+    for he4 in he4_values + he4_values:
+        assert name_method(he4) == f"custom_He{round(he4, 6)}{suffix}"
+
+
+@pytest.mark.parametrize('name_method, suffix', NAME_METHODS)
+def test_model_name_numpy_scalars(name_method, suffix):
+    for he4 in (np.float64(3.5e-06), np.float64(0.0), np.int64(0)):
+        assert name_method(he4) == f"custom_He{round(he4.item(), 6)}{suffix}"
+
+
+@pytest.mark.parametrize('name_method, suffix', NAME_METHODS)
+@pytest.mark.parametrize('he4', [0.5, 0.123456789, 3.5e-06, 1e-05, 0.9999995,
+                                 math.nan, math.inf])
+def test_model_name_matches_round(name_method, suffix, he4):
+    assert name_method(he4) == f"custom_He{round(he4, 6)}{suffix}"
+
+
+VECTOR_NAME_METHODS = [
+    (SdbGrid.evol_model_names, '.data'),
+    (SdbGrid.puls_model_names, '_summary.txt'),
+    (SdbGrid.gyre_input_names, '.data.GYRE'),
+]
+
+
+@pytest.mark.parametrize('name_method, suffix', VECTOR_NAME_METHODS)
+@pytest.mark.parametrize('he4', [
+    [0, 1],
+    [0.0, 1.0],
+    [0, 0.5, 1.0, 1],
+    [0.5, 0.123456789, 3.5e-06, 1e-05, 0.9999995, math.nan, math.inf],
+    np.array([0, 1]),
+    np.array([0.0, 3.5e-06, 0.5]),
+    pd.Series([0.0, 0.1234565, 1.0]),
+    [],
+])
+def test_model_names_match_scalar(name_method, suffix, he4):
+    values = he4.tolist() if hasattr(he4, 'tolist') else he4
+    expected = [f"custom_He{round(value, 6)}{suffix}" for value in values]
+    assert list(name_method(he4)) == expected
+
+
+def test_model_names_tie_values():
+    he4 = (np.arange(100_000) + 0.5) / 1e6
+    assert list(SdbGrid.evol_model_names(he4)) == [
+        f"custom_He{round(value, 6)}.data" for value in he4.tolist()]